@@ -2,59 +2,155 @@
 
 import os
 import argparse
-import io
+import asyncio
+import functools
+import queue
+import sys
+import tempfile
+import threading
 import time
-import pickle # For storing/loading Drive API tokens
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
-# --- Google Gemini AI ---
-import google.generativeai as genai
-
-# --- Google Drive API ---
-from googleapiclient.discovery import build
-from googleapiclient.http import MediaIoUpload
-from google_auth_oauthlib.flow import InstalledAppFlow
-from google.auth.transport.requests import Request
+# The Google SDKs (google.generativeai, googleapiclient, google_auth_oauthlib,
+# google.cloud.storage) are imported lazily inside the functions that need
+# them: together they cost the better part of a second at import time, which
+# would otherwise be paid even for `--help`.
 
 # --- Optional for downloading video from URIs ---
+# httpx is preferred (keep-alive pool, HTTP/2 multiplexing with the 'h2'
+# extra: pip install 'httpx[http2]'); requests remains the fallback.
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
 try:
     import requests
 except ImportError:
     requests = None # Will check later if needed
 
+# Hardware-accelerated CRC32C (C extension using the SSE4.2 crc32 instruction).
+# Merely having it importable makes the Google upload/download libraries use it
+# instead of the pure-Python checksum, which matters on multi-hundred-MB videos.
 try:
-    from google.cloud import storage
+    import google_crc32c # noqa: F401
 except ImportError:
-    storage = None # Will check later if needed
+    google_crc32c = None # Checksums fall back to the (slow) pure-Python path
 
 
 # --- Configuration ---
 GEMINI_API_KEY_ENV_VAR = "GOOGLE_GEMINI_API_KEY"
 
 DRIVE_SCOPES = ['https://www.googleapis.com/auth/drive']
-DRIVE_TOKEN_PICKLE = 'token.pickle'
+DRIVE_TOKEN_JSON = 'token.json'
 DRIVE_CREDENTIALS_JSON = 'credentials.json'
 
+# --- Download tuning ---
+# Parallel Range-GET download settings for HTTPS video URIs. Multiple TCP
+# streams fill the bandwidth-delay product far better than a single one.
+DOWNLOAD_CHUNK_SIZE = 8 * 1024 * 1024  # 8MB per Range request
+# Read-block size for single-stream downloads. Small blocks mean one Python
+# iteration per few KB; 4MB keeps the interpreter out of the way.
+DOWNLOAD_STREAM_BLOCK = 4 * 1024 * 1024
+DOWNLOAD_MAX_CONCURRENCY = min(16, (os.cpu_count() or 4) * 2)
+# Below this size a single GCS stream wins: per-chunk request overhead
+# dominates and the parallel machinery doesn't pay for itself.
+GCS_PARALLEL_DOWNLOAD_THRESHOLD = 100 * 1024 * 1024
+GCS_PARALLEL_DOWNLOAD_CHUNK_SIZE = 64 * 1024 * 1024
+
+# --- Network robustness ---
+# Split connect/read timeouts: a dead host is noticed in 10s instead of tying
+# up the 300s read allowance, which stays generous so slow links can finish
+# multi-hundred-MB transfers without false timeouts.
+HTTP_CONNECT_TIMEOUT = 10
+HTTP_READ_TIMEOUT = 300
+HTTP_TIMEOUT = (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)
+HTTP_RETRY_TOTAL = 5
+HTTP_RETRY_STATUSES = [429, 500, 502, 503, 504]
+
+# --- Shared HTTP client ---
+# One keep-alive connection pool for every direct HTTP call the script makes,
+# so TLS/DNS handshakes are paid once and the Range requests of a parallel
+# download multiplex over a few warm connections instead of opening their own.
+if httpx:
+    _HTTP_LIMITS = httpx.Limits(max_connections=32, max_keepalive_connections=16)
+    _HTTP_TIMEOUT = httpx.Timeout(float(HTTP_READ_TIMEOUT), connect=float(HTTP_CONNECT_TIMEOUT))
+    # httpx transport retries cover connection failures only (safe for any
+    # verb); status-code retries live in the requests fallback's urllib3 Retry.
+    try:
+        _HTTP_TRANSPORT = httpx.HTTPTransport(http2=True, retries=HTTP_RETRY_TOTAL, limits=_HTTP_LIMITS)
+    except ImportError: # httpx installed without the 'h2' extra
+        _HTTP_TRANSPORT = httpx.HTTPTransport(retries=HTTP_RETRY_TOTAL, limits=_HTTP_LIMITS)
+    # follow_redirects matches the requests fallback (redirects followed by
+    # default); httpx refuses them otherwise, which would break signed URLs
+    # that bounce through a redirect on every GET after the HEAD probe passed.
+    HTTP_CLIENT = httpx.Client(transport=_HTTP_TRANSPORT, timeout=_HTTP_TIMEOUT,
+                               follow_redirects=True)
+else:
+    HTTP_CLIENT = None # Per-call 'requests' paths are used instead
+
+# --- Upload tuning ---
+UPLOAD_CHUNK_SIZE = 5 * 1024 * 1024  # 5MB chunks for streamed (unknown-length) uploads
+# For spooled files the chunk size adapts to the video: each chunk costs a
+# round-trip, so small files go up in one request (chunksize=-1) and large
+# ones use 64MB chunks to amortize the RTTs.
+UPLOAD_SINGLE_REQUEST_MAX = 200 * 1024 * 1024
+UPLOAD_LARGE_CHUNK_SIZE = 64 * 1024 * 1024
+# At or below this size, skip the resumable protocol entirely: a multipart
+# create is one POST, versus the session-init round-trip plus PUT.
+UPLOAD_MULTIPART_MAX = 5 * 1024 * 1024
+
+# --- Batch tuning ---
+# Max prompts processed at once with --prompts-file; each in-flight prompt
+# costs a generation slot plus download/upload bandwidth.
+BATCH_CONCURRENCY = 8
+# Max in-flight 5MB buffers between the downloader thread and the Drive
+# uploader when pipelining (backpressure so we don't buffer the whole video).
+PIPELINE_QUEUE_DEPTH = 4
+
 # --- Veo Configuration (Updated based on hypothetical docs) ---
 # This is a plausible model name. Replace with the actual one when known.
 VEO_MODEL_NAME = "models/veo-1.0" # Example: "models/veo-1.0", "models/gemini-pro-video"
 # Default MIME type if not explicitly provided by the API response for the video
 DEFAULT_VIDEO_MIME_TYPE = "video/mp4"
+# Extensions accepted as-is on a requested output filename (O(1) lookup
+# against the real suffix, rather than lowercasing the whole name and
+# comparing every known suffix).
+_VIDEO_EXTS = frozenset({'.mp4', '.mov', '.avi', '.webm', '.mkv'})
 
 
 # --- Google Drive Authentication Function (same as before) ---
-def get_google_drive_service():
+_drive_credentials = None # Success-only cache; see _get_drive_credentials
+
+
+def _get_drive_credentials():
+    # Cached only on success: repeated calls (e.g. batch runs) reuse the
+    # authorized credentials, but a failure (say, a missing credentials.json
+    # in a long-running wrapper) is retried on the next call instead of
+    # being remembered forever.
+    global _drive_credentials
+    if _drive_credentials is not None:
+        return _drive_credentials
+
+    from google_auth_oauthlib.flow import InstalledAppFlow
+    from google.auth.transport.requests import Request
+    from google.oauth2.credentials import Credentials
+
     creds = None
-    if os.path.exists(DRIVE_TOKEN_PICKLE):
-        with open(DRIVE_TOKEN_PICKLE, 'rb') as token:
-            creds = pickle.load(token)
+    if os.path.exists(DRIVE_TOKEN_JSON):
+        try:
+            creds = Credentials.from_authorized_user_file(DRIVE_TOKEN_JSON, DRIVE_SCOPES)
+        except (ValueError, KeyError) as e:
+            print(f"Stored Drive token is unreadable: {e}. Deleting '{DRIVE_TOKEN_JSON}' for re-auth.")
+            os.remove(DRIVE_TOKEN_JSON)
 
     if not creds or not creds.valid:
         if creds and creds.expired and creds.refresh_token:
             try:
                 creds.refresh(Request())
             except Exception as e:
-                print(f"Failed to refresh Drive token: {e}. Deleting '{DRIVE_TOKEN_PICKLE}' for re-auth.")
-                if os.path.exists(DRIVE_TOKEN_PICKLE): os.remove(DRIVE_TOKEN_PICKLE)
+                print(f"Failed to refresh Drive token: {e}. Deleting '{DRIVE_TOKEN_JSON}' for re-auth.")
+                if os.path.exists(DRIVE_TOKEN_JSON): os.remove(DRIVE_TOKEN_JSON)
                 creds = None
         if not creds: # Re-authenticate
             if not os.path.exists(DRIVE_CREDENTIALS_JSON):
@@ -66,22 +162,147 @@ def get_google_drive_service():
                 DRIVE_CREDENTIALS_JSON, DRIVE_SCOPES)
             creds = flow.run_local_server(port=0)
 
-        with open(DRIVE_TOKEN_PICKLE, 'wb') as token:
-            pickle.dump(creds, token)
+        with open(DRIVE_TOKEN_JSON, 'w') as token:
+            token.write(creds.to_json())
+    _drive_credentials = creds
+    return creds
+
+
+def get_google_drive_service():
+    # Deliberately NOT memoized: googleapiclient service objects share an
+    # httplib2.Http that is not thread-safe, so each worker thread builds its
+    # own (cheap, thanks to cached credentials and static discovery).
+    from googleapiclient.discovery import build
+
+    creds = _get_drive_credentials()
+    if not creds:
+        return None
     try:
-        service = build('drive', 'v3', credentials=creds)
+        # static_discovery uses the discovery document bundled with
+        # googleapiclient (>=2.0) instead of fetching it over the network.
+        service = build('drive', 'v3', credentials=creds, static_discovery=True)
         print("Google Drive API service created successfully.")
         return service
     except Exception as e:
         print(f"An error occurred building the Drive service: {e}")
         return None
 
+@functools.lru_cache(maxsize=1)
+def _requests_session():
+    """Shared requests.Session with retries (connection errors and retryable
+    HTTP statuses, with backoff) and a pool sized for the parallel download."""
+    from urllib3.util.retry import Retry
+
+    session = requests.Session()
+    retry = Retry(total=HTTP_RETRY_TOTAL, backoff_factor=0.5,
+                  status_forcelist=HTTP_RETRY_STATUSES,
+                  allowed_methods=["HEAD", "GET", "PUT", "POST"])
+    adapter = requests.adapters.HTTPAdapter(max_retries=retry,
+                                            pool_connections=32, pool_maxsize=32)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+@functools.lru_cache(maxsize=1)
+def _get_storage_client():
+    # Memoized for the same reason as the Drive service: building a GCS client
+    # resolves credentials and sets up an HTTP stack on every instantiation.
+    from google.cloud import storage
+    return storage.Client() # Uses Application Default Credentials
+
+
+# --- HTTPS Download Helper ---
+def _parallel_http_download(url: str, dest_path: str,
+                            chunk_size: int = DOWNLOAD_CHUNK_SIZE,
+                            max_concurrency: int = DOWNLOAD_MAX_CONCURRENCY) -> int:
+    """
+    Downloads `url` into the file at `dest_path` using several parallel Range
+    GETs, writing each slice at its offset with os.pwrite (thread-safe).
+    Falls back to a plain single-stream download if the server doesn't advertise
+    Range support (Accept-Ranges: bytes), doesn't report a Content-Length, or
+    the platform lacks os.pwrite (Windows). Returns the number of bytes written.
+    """
+    session = _requests_session() if HTTP_CLIENT is None else None
+
+    total = None
+    accept_ranges = False
+    try:
+        if HTTP_CLIENT is not None:
+            head_response = HTTP_CLIENT.head(url)
+        else:
+            head_response = session.head(url, allow_redirects=True,
+                                         timeout=(HTTP_CONNECT_TIMEOUT, 30))
+        head_response.raise_for_status()
+        if head_response.headers.get("Content-Length"):
+            total = int(head_response.headers["Content-Length"])
+        accept_ranges = head_response.headers.get("Accept-Ranges", "").lower() == "bytes"
+    except Exception as e_head:
+        print(f"HEAD request failed ({e_head}); falling back to single-stream download.")
+
+    if not total or not accept_ranges or not hasattr(os, "pwrite"):
+        if total and not accept_ranges:
+            print("Server does not support Range requests; using single-stream download.")
+        elif total and accept_ranges:
+            print("os.pwrite is unavailable on this platform; using single-stream download.")
+        with open(dest_path, 'wb') as dest:
+            if HTTP_CLIENT is not None:
+                with HTTP_CLIENT.stream("GET", url) as http_response:
+                    http_response.raise_for_status()
+                    for chunk in http_response.iter_bytes(DOWNLOAD_STREAM_BLOCK):
+                        dest.write(chunk)
+            else:
+                http_response = session.get(url, stream=True, timeout=HTTP_TIMEOUT)
+                http_response.raise_for_status()
+                # Video bytes arrive identity-encoded; skipping the decoder
+                # avoids a pointless pass over every chunk.
+                http_response.raw.decode_content = False
+                # readinto() a single reusable buffer: unlike copyfileobj's
+                # read()/write() loop, no fresh bytes object per iteration.
+                buf = bytearray(DOWNLOAD_STREAM_BLOCK)
+                view = memoryview(buf)
+                while True:
+                    num_read = http_response.raw.readinto(view)
+                    if not num_read:
+                        break
+                    dest.write(view[:num_read])
+            return dest.tell()
+
+    ranges = [(start, min(start + chunk_size, total)) for start in range(0, total, chunk_size)]
+    workers = min(max_concurrency, len(ranges))
+    print(f"Downloading {total} bytes in {len(ranges)} chunks with {workers} parallel streams...")
+
+    with open(dest_path, 'wb') as dest:
+        dest.truncate(total)  # Preallocate so each slice can be written at its offset
+        fd = dest.fileno()
+
+        def fetch_range(start: int, end: int):
+            headers = {"Range": f"bytes={start}-{end - 1}"}
+            if HTTP_CLIENT is not None:
+                range_response = HTTP_CLIENT.get(url, headers=headers)
+            else:
+                range_response = session.get(url, headers=headers, timeout=HTTP_TIMEOUT)
+            range_response.raise_for_status()
+            os.pwrite(fd, range_response.content, start)
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(fetch_range, start, end) for start, end in ranges]
+            for future in as_completed(futures):
+                future.result()  # Re-raises any download error
+
+    return total
+
+
 # --- Gemini Veo Video Generation Function (Updated) ---
 def generate_veo_video(prompt: str, gemini_api_key: str):
     """
     Generates video using the Veo model via Gemini API.
     Assumes the API returns a file_uri for the generated video.
+    Returns (file_uri, mime_type); the caller decides whether to spool the
+    video to disk (download_video) or pipeline it straight into the upload.
     """
+    import google.generativeai as genai
+
     print(f"\n--- Generating Video for Prompt: '{prompt}' ---")
     print(f"Using Veo model: {VEO_MODEL_NAME}")
 
@@ -115,14 +336,17 @@ def generate_veo_video(prompt: str, gemini_api_key: str):
             print("Response details:", response)
             return None, None
 
-        video_part = None
-        for part in response.candidates[0].content.parts:
-            if hasattr(part, 'file_data') and part.file_data.mime_type.startswith('video/'):
-                video_part = part
-                break
-            # It's also possible that the response directly contains a video URI not nested in file_data
-            # e.g. if response.candidates[0].content has a 'video_uri' attribute.
-            # This needs to be confirmed with actual API documentation.
+        # Cache the parts container once; each access resolves a descriptor on
+        # the proto message. getattr() also replaces the hasattr probe, which
+        # costs a __getattr__ call per part on proto messages.
+        parts = response.candidates[0].content.parts
+        video_part = next(
+            (part for part in parts
+             if getattr(part, 'file_data', None) and part.file_data.mime_type.startswith('video/')),
+            None)
+        # It's also possible that the response directly contains a video URI not nested in file_data
+        # e.g. if response.candidates[0].content has a 'video_uri' attribute.
+        # This needs to be confirmed with actual API documentation.
 
         if not video_part:
             print("ERROR: Could not find video data (as file_data) in the Gemini response.")
@@ -133,124 +357,459 @@ def generate_veo_video(prompt: str, gemini_api_key: str):
         video_mime_type = video_part.file_data.mime_type or DEFAULT_VIDEO_MIME_TYPE
 
         print(f"Video generation apparently successful. File URI: {file_uri}, MIME type: {video_mime_type}")
-        print("Attempting to download video from URI...")
+        return file_uri, video_mime_type
+
+    except Exception as e:
+        print(f"An error occurred during Veo video generation: {e}")
+        # Consider logging the full response if available and an error occurs
+        # if 'response' in locals(): print("Full response:", response)
+        return None, None
+
+
+def _gcs_signed_https_url(file_uri: str):
+    """
+    Converts gs://bucket/name into a V4 signed HTTPS URL so GCS-hosted videos
+    can ride the same parallel-Range / pipelined HTTPS machinery as https://
+    URIs (one implementation, both schemes). Returns None when signing isn't
+    possible - e.g. application-default credentials without a service-account
+    key - in which case the caller keeps the native GCS download path.
+    """
+    try:
+        client = _get_storage_client()
+        bucket_name, blob_name = file_uri[5:].split("/", 1)
+        blob = client.bucket(bucket_name).blob(blob_name)
+        return blob.generate_signed_url(version="v4", expiration=3600)
+    except Exception as e:
+        # Covers a missing library and client-construction failures (no ADC)
+        # too; download_video prints the actionable guidance for those.
+        print(f"Could not sign GCS URL ({e}); using the native GCS download.")
+        return None
+
+
+# --- Video Download Function ---
+def download_video(file_uri: str):
+    """
+    Downloads the video at `file_uri` (https:// or gs://) to a temporary file
+    and returns its path, or None on failure. The caller is responsible for
+    deleting the file when done.
+    """
+    print("Attempting to download video from URI...")
 
-        video_bytes = None
+    # Spool the download to a temp file instead of holding it in RAM;
+    # peak memory stays flat regardless of video size.
+    tmp = tempfile.NamedTemporaryFile(delete=False, suffix=".mp4")
+    video_path = tmp.name
+    downloaded = False
+    try:
         # Scenario 1: URI is a direct HTTPS link (e.g., a signed URL)
         if file_uri.startswith("https://"):
-            if not requests:
-                print("ERROR: The 'requests' library is required to download from HTTPS URIs but is not installed.")
-                print("Please install it: pip install requests")
-                return None, None
+            if not HTTP_CLIENT and not requests:
+                print("ERROR: An HTTP client library is required to download from HTTPS URIs but none is installed.")
+                print("Please install one: pip install 'httpx[http2]' (or: pip install requests)")
+                return None
             try:
                 print(f"Downloading from HTTPS: {file_uri}")
                 # Some APIs might require the API key in the auth header for the download too
                 # headers = {"Authorization": f"Bearer {gemini_api_key}"}
-                # http_response = requests.get(file_uri, headers=headers, stream=True)
-                http_response = requests.get(file_uri, stream=True, timeout=300) # 5 min timeout for download
-                http_response.raise_for_status()
-                video_bytes = http_response.content
-                print(f"Successfully downloaded video ({len(video_bytes)} bytes) from HTTPS URI.")
-            except requests.exceptions.RequestException as e_req:
+                tmp.close()
+                num_bytes = _parallel_http_download(file_uri, video_path)
+                print(f"Successfully downloaded video ({num_bytes} bytes) from HTTPS URI.")
+                downloaded = True
+            except Exception as e_req:
                 print(f"ERROR: Failed to download video from HTTPS URI '{file_uri}': {e_req}")
-                return None, None
+                return None
 
         # Scenario 2: URI is a Google Cloud Storage link (gs://)
         elif file_uri.startswith("gs://"):
-            if not storage:
+            try:
+                client = _get_storage_client()
+            except ImportError:
                 print("ERROR: The 'google-cloud-storage' library is required to download from GCS URIs (gs://) but is not installed.")
                 print("Please install it: pip install google-cloud-storage")
-                return None, None
+                return None
+            except Exception as e_client:
+                # e.g. DefaultCredentialsError (no ADC) or OSError (no project)
+                print(f"ERROR: Could not create a GCS client: {e_client}")
+                print("Ensure you have 'gcloud auth application-default login' configured and permissions to access the GCS object.")
+                return None
             try:
                 print(f"Downloading from GCS: {file_uri}")
-                client = storage.Client() # Uses Application Default Credentials
                 # Parse gs:// URI
                 bucket_name, blob_name = file_uri[5:].split("/", 1)
                 bucket = client.bucket(bucket_name)
                 blob = bucket.blob(blob_name)
-                video_bytes = blob.download_as_bytes(timeout=300) # 5 min timeout
-                print(f"Successfully downloaded video ({len(video_bytes)} bytes) from GCS URI.")
+                blob.reload() # Fetch metadata (size) to pick a download strategy
+
+                transfer_manager = None
+                if blob.size and blob.size > GCS_PARALLEL_DOWNLOAD_THRESHOLD:
+                    try:
+                        from google.cloud.storage import transfer_manager
+                    except ImportError:
+                        print("Installed google-cloud-storage lacks transfer_manager; using a single stream.")
+
+                if transfer_manager is not None:
+                    # Large blob: range downloads in a worker pool beat one stream.
+                    tmp.close()
+                    print(f"Blob is {blob.size} bytes; downloading chunks concurrently...")
+                    # Thread workers, not the default process pool: forking
+                    # from a multi-threaded process (batch mode) risks
+                    # deadlock on the auth/gRPC locks, and threads are plenty
+                    # for a network-bound transfer.
+                    transfer_manager.download_chunks_concurrently(
+                        blob, video_path,
+                        chunk_size=GCS_PARALLEL_DOWNLOAD_CHUNK_SIZE,
+                        max_workers=DOWNLOAD_MAX_CONCURRENCY,
+                        worker_type=transfer_manager.THREAD,
+                        download_kwargs={"timeout": HTTP_READ_TIMEOUT})
+                else:
+                    blob.download_to_file(tmp, timeout=HTTP_READ_TIMEOUT)
+                    tmp.close()
+                print(f"Successfully downloaded video ({os.path.getsize(video_path)} bytes) from GCS URI.")
+                downloaded = True
             except Exception as e_gcs:
                 print(f"ERROR: Failed to download video from GCS URI '{file_uri}': {e_gcs}")
                 print("Ensure you have 'gcloud auth application-default login' configured and permissions to access the GCS object.")
-                return None, None
+                return None
         else:
             print(f"ERROR: Unrecognized or unsupported file URI scheme: {file_uri}")
             print("The script currently supports 'https://' and 'gs://' URIs for generated videos.")
-            return None, None
-
-        if video_bytes:
-            return video_bytes, video_mime_type
-        else:
-            print("ERROR: Video bytes could not be retrieved after URI processing.")
-            return None, None
-
-    except Exception as e:
-        print(f"An error occurred during Veo video generation or download: {e}")
-        # Consider logging the full response if available and an error occurs
-        # if 'response' in locals(): print("Full response:", response)
-        return None, None
-
-
-# --- Google Drive Upload Function (same as before) ---
-def upload_to_drive(drive_service, filename: str, video_bytes: bytes, mime_type: str, folder_id: str = None):
-    if not drive_service:
-        print("Drive service not available. Cannot upload.")
+            return None
+    finally:
+        if not tmp.closed:
+            tmp.close()
+        if not downloaded:
+            # Clean up the temp file on any failed/aborted download
+            if os.path.exists(video_path): os.remove(video_path)
+
+    if os.path.getsize(video_path) > 0:
+        return video_path
+    else:
+        print("ERROR: Video file is empty after URI processing.")
+        os.remove(video_path)
         return None
 
-    print(f"\n--- Uploading '{filename}' to Google Drive ---")
-    file_metadata = {'name': filename}
-    if folder_id:
-        file_metadata['parents'] = [folder_id]
 
-    media = MediaIoUpload(io.BytesIO(video_bytes),
-                          mimetype=mime_type,
-                          resumable=True,
-                          chunksize=1024*1024*5) # 5MB chunks
+# --- Google Drive Upload Functions ---
+# Note on parallelism: unlike GCS, the Drive API has no compose/merge call, so
+# a file cannot be uploaded as N independent slices and stitched server-side,
+# and a single resumable session requires its PUTs to arrive in byte order.
+# Uploads therefore stay on one sequential session; the parallel TCP streams
+# live on the download leg (_parallel_http_download), where Range requests
+# make byte-level parallelism possible.
+#
+# Note on media sources: nothing here holds the video in memory, so
+# MediaInMemoryUpload (and the BytesIO-wrapping it replaces) has no place -
+# spooled files go up via MediaFileUpload and pipelined transfers via the
+# queue-fed _QueueMediaUpload.
+#
+# Note on sendfile: an os.sendfile/socket.sendfile fast path for spooled
+# files was tried and removed. Drive is HTTPS-only, so the socket is an
+# ssl.SSLSocket and CPython's SSLSocket.sendfile always takes the plain
+# read/send() fallback (no kTLS) in 8KB blocks - slower than the 64MB-chunk
+# MediaFileUpload it preempted, with none of googleapiclient's resume or
+# error handling. Zero-copy isn't reachable from here; don't re-add it.
+def _report_uploaded_file(filename: str, response: dict):
+    file_id = response.get('id')
+    file_link = response.get('webViewLink')
+    print(f"SUCCESS: File '{filename}' uploaded to Google Drive.")
+    print(f"File ID: {file_id}")
+    print(f"View Link: {file_link}")
+    return file_link
+
+
+def _run_drive_upload(drive_service, file_metadata: dict, media, filename: str):
+    """Drives a resumable files().create upload to completion, printing progress."""
     try:
         request = drive_service.files().create(body=file_metadata,
                                                media_body=media,
                                                fields='id, webViewLink')
         response = None
         progress = 0
+        show_progress = sys.stderr.isatty() # No progress spam into piped logs
         print("Starting upload...")
         while response is None:
             try:
                 status, response = request.next_chunk()
-                if status:
-                    new_progress = int(status.progress() * 100)
-                    if new_progress > progress: # Only print if progress actually increased
+                # total_size is unset for unknown-length (pipelined) uploads,
+                # where a percentage is meaningless anyway.
+                if status and show_progress and status.total_size:
+                    # Integer math, a 5% step and unflushed stderr keep the
+                    # reporting cost off the per-chunk hot path.
+                    new_progress = (status.resumable_progress * 100) // status.total_size
+                    if new_progress >= progress + 5:
                         progress = new_progress
-                        print(f"Uploaded {progress}%")
+                        print(f"Uploaded {progress}%", file=sys.stderr, flush=False)
             except Exception as e_chunk:
                 print(f"Error during chunk upload: {e_chunk}. Retrying may be necessary or check connection.")
                 # For a robust solution, implement retries here.
                 return None
 
-        file_id = response.get('id')
-        file_link = response.get('webViewLink')
-        print(f"SUCCESS: File '{filename}' uploaded to Google Drive.")
-        print(f"File ID: {file_id}")
-        print(f"View Link: {file_link}")
-        return file_link
+        return _report_uploaded_file(filename, response)
     except Exception as e:
         print(f"An error occurred uploading to Drive: {e}")
         return None
 
 
+def upload_to_drive(drive_service, filename: str, video_path: str, mime_type: str,
+                    folder_id: str = None, chunksize: int = None):
+    if not drive_service:
+        print("Drive service not available. Cannot upload.")
+        return None
+
+    print(f"\n--- Uploading '{filename}' to Google Drive ---")
+    file_metadata = {'name': filename}
+    if folder_id:
+        file_metadata['parents'] = [folder_id]
+
+    from googleapiclient.http import MediaFileUpload
+
+    video_size = os.path.getsize(video_path)
+    if video_size <= UPLOAD_MULTIPART_MAX:
+        # Small video: one multipart POST beats the resumable session-init
+        # round-trip plus PUT.
+        media = MediaFileUpload(video_path, mimetype=mime_type, resumable=False)
+        try:
+            print("Starting upload (single request)...")
+            response = drive_service.files().create(body=file_metadata,
+                                                    media_body=media,
+                                                    fields='id, webViewLink').execute()
+            return _report_uploaded_file(filename, response)
+        except Exception as e:
+            print(f"An error occurred uploading to Drive: {e}")
+            return None
+
+    if chunksize is None:
+        # Auto: single-request upload for smaller videos, 64MB chunks beyond.
+        chunksize = -1 if video_size < UPLOAD_SINGLE_REQUEST_MAX else UPLOAD_LARGE_CHUNK_SIZE
+
+    media = MediaFileUpload(video_path,
+                            mimetype=mime_type,
+                            resumable=True,
+                            chunksize=chunksize)
+    return _run_drive_upload(drive_service, file_metadata, media, filename)
+
+
+@functools.lru_cache(maxsize=1)
+def _queue_media_upload_class():
+    # Built once inside a factory so the googleapiclient import stays lazy.
+    from googleapiclient.http import MediaUpload
+
+    class _QueueMediaUpload(MediaUpload):
+        """
+        Feeds a resumable Drive upload from a bounded producer/consumer queue.
+        MediaIoBaseUpload can't be used here: it sizes its stream up front
+        with a seek-to-end and its size() never returns None, so it cannot
+        represent a live stream of unknown length. This subclass reports
+        size() as None until the source is exhausted, which makes
+        next_chunk() send 'Content-Range: bytes a-b/*' chunks and finalize
+        on the first short read. Retries re-request the chunk currently in
+        flight, so buffered data is kept from that chunk's start and memory
+        stays bounded at about one chunk regardless of video size.
+        """
+
+        def __init__(self, chunk_queue, mimetype, chunksize=UPLOAD_CHUNK_SIZE):
+            super().__init__()
+            self._queue = chunk_queue
+            self._mimetype = mimetype
+            self._chunksize = chunksize
+            self._buf = bytearray()
+            self._buf_start = 0 # Absolute offset of self._buf[0]
+            self._total = None  # Known once the EOF sentinel arrives
+
+        def chunksize(self):
+            return self._chunksize
+
+        def mimetype(self):
+            return self._mimetype
+
+        def size(self):
+            return self._total
+
+        def resumable(self):
+            return True
+
+        def has_stream(self):
+            return False
+
+        def getbytes(self, begin, length):
+            if begin < self._buf_start:
+                raise ValueError(
+                    f"requested offset {begin} precedes buffered window at {self._buf_start}")
+            # Advance the window: the uploader only ever reaches back to the
+            # start of the in-flight chunk (on retry), never further.
+            del self._buf[:begin - self._buf_start]
+            self._buf_start = begin
+            while len(self._buf) < length and self._total is None:
+                item = self._queue.get()
+                if item is None:
+                    self._total = self._buf_start + len(self._buf)
+                elif isinstance(item, Exception):
+                    self._total = self._buf_start + len(self._buf)
+                    raise item
+                else:
+                    self._buf.extend(item)
+            return bytes(self._buf[:length])
+
+    return _QueueMediaUpload
+
+
+def upload_stream_to_drive(drive_service, filename: str, file_uri: str, mime_type: str,
+                           folder_id: str = None, chunksize: int = None):
+    """
+    Pipelines an HTTPS download straight into a resumable Drive upload so the
+    two WAN transfers overlap: wall-clock becomes ~max(down, up) rather than
+    down + up. A downloader thread feeds a bounded queue; the main thread
+    drives the chunked upload from the queue's read end. An explicit
+    `chunksize` overrides the default; -1 (single request) needs the total
+    size up front, which a pipelined upload never has, so it is ignored.
+    """
+    if not drive_service:
+        print("Drive service not available. Cannot upload.")
+        return None
+
+    if chunksize is not None and chunksize <= 0:
+        print("Note: --upload-chunksize -1 needs the total size up front; the streamed upload stays chunked.")
+        chunksize = None
+    upload_chunksize = chunksize or UPLOAD_CHUNK_SIZE
+
+    print(f"\n--- Streaming '{filename}' from source to Google Drive ---")
+    file_metadata = {'name': filename}
+    if folder_id:
+        file_metadata['parents'] = [folder_id]
+
+    chunk_queue = queue.Queue(maxsize=PIPELINE_QUEUE_DEPTH)
+
+    def downloader():
+        try:
+            if HTTP_CLIENT is not None:
+                with HTTP_CLIENT.stream("GET", file_uri) as http_response:
+                    http_response.raise_for_status()
+                    for chunk in http_response.iter_bytes(upload_chunksize):
+                        chunk_queue.put(chunk)
+            else:
+                http_response = _requests_session().get(file_uri, stream=True, timeout=HTTP_TIMEOUT)
+                http_response.raise_for_status()
+                for chunk in http_response.iter_content(chunk_size=upload_chunksize):
+                    chunk_queue.put(chunk)
+        except Exception as e_down:
+            chunk_queue.put(e_down)
+        finally:
+            chunk_queue.put(None) # EOF sentinel
+
+    download_thread = threading.Thread(target=downloader, name="veo-downloader", daemon=True)
+    download_thread.start()
+
+    # Total length is unknown up front, so this is a chunked resumable upload.
+    media = _queue_media_upload_class()(chunk_queue, mime_type, chunksize=upload_chunksize)
+    try:
+        return _run_drive_upload(drive_service, file_metadata, media, filename)
+    finally:
+        download_thread.join(timeout=10)
+
+
 # --- Main Execution ---
+def _build_output_filename(prompt: str, video_mime_type: str, requested: str = None):
+    """Returns the Drive filename for a video, honoring an explicit request."""
+    if requested:
+        output_filename = requested
+        # Ensure it has a video extension if not provided
+        if os.path.splitext(output_filename)[1].lower() not in _VIDEO_EXTS:
+            inferred_ext = video_mime_type.split('/')[-1]
+            if inferred_ext and inferred_ext != '*': # e.g., 'mp4' from 'video/mp4'
+                output_filename = f"{output_filename}.{inferred_ext}"
+            else:
+                output_filename = f"{output_filename}.mp4" # Default to .mp4
+        return output_filename
+
+    timestamp = time.strftime("%Y%m%d-%H%M%S")
+    ext = video_mime_type.split('/')[-1] if video_mime_type and video_mime_type.split('/')[-1] != '*' else 'mp4'
+    return f"veo_video_{prompt[:20].replace(' ','_')}_{timestamp}.{ext}" # Add part of prompt for easier ID
+
+
+def process_prompt(prompt: str, gemini_api_key: str, args):
+    """Runs the full generate -> transfer pipeline for one prompt.
+    Returns the Drive link on success, else None."""
+    drive_service = get_google_drive_service()
+    if not drive_service:
+        print("Failed to create Google Drive service. Skipping prompt.")
+        return None
+
+    file_uri, video_mime_type = generate_veo_video(prompt, gemini_api_key)
+    if not file_uri or not video_mime_type:
+        print(f"Video generation failed for prompt: '{prompt}'")
+        return None
+
+    output_filename = _build_output_filename(prompt, video_mime_type, args.output_filename)
+
+    if file_uri.startswith("gs://") and (HTTP_CLIENT or requests):
+        # A signed URL lets the GCS leg reuse the HTTPS transfer paths
+        # (parallel Range GETs, pipelined upload) instead of its own client.
+        signed_url = _gcs_signed_https_url(file_uri)
+        if signed_url:
+            print("Using a signed HTTPS URL for the GCS video.")
+            file_uri = signed_url
+
+    if file_uri.startswith("https://") and (HTTP_CLIENT or requests) and not args.no_pipeline:
+        # Overlap the download and upload legs instead of running them serially.
+        return upload_stream_to_drive(drive_service, output_filename, file_uri,
+                                      video_mime_type, args.folder_id,
+                                      chunksize=args.upload_chunksize)
+
+    video_path = download_video(file_uri)
+    if not video_path:
+        print(f"Video download failed for prompt: '{prompt}'")
+        return None
+    try:
+        return upload_to_drive(drive_service, output_filename, video_path, video_mime_type,
+                               args.folder_id, chunksize=args.upload_chunksize)
+    finally:
+        # The downloaded video lives in a temp file; remove it once uploaded (or failed).
+        if os.path.exists(video_path): os.remove(video_path)
+
+
+async def _process_prompts_async(prompts, gemini_api_key, args):
+    """Processes a batch of prompts concurrently. Each prompt's (synchronous,
+    network-bound) pipeline runs in a worker thread via asyncio.to_thread;
+    a semaphore caps how many are in flight at once."""
+    semaphore = asyncio.Semaphore(BATCH_CONCURRENCY)
+
+    async def run_one(prompt):
+        async with semaphore:
+            try:
+                return await asyncio.to_thread(process_prompt, prompt, gemini_api_key, args)
+            except Exception as e:
+                # One bad prompt must not abort the batch (or discard the
+                # links of prompts that already finished).
+                print(f"Unexpected error processing prompt '{prompt[:50]}': {e}")
+                return None
+
+    return await asyncio.gather(*(run_one(p) for p in prompts))
+
+
 def main():
     parser = argparse.ArgumentParser(description="Generate Veo video from a prompt using Gemini API and upload to Google Drive.")
-    parser.add_argument("prompt", type=str, help="The text prompt for video generation.")
+    parser.add_argument("prompt", type=str, nargs="?", default=None,
+                        help="The text prompt for video generation.")
     parser.add_argument("-o", "--output_filename", type=str, default=None,
-                        help="Desired filename for the video on Google Drive (e.g., my_veo_video.mp4). Default uses a timestamp.")
+                        help="Desired filename for the video on Google Drive (e.g., my_veo_video.mp4). Default uses a timestamp. Ignored with --prompts-file.")
     parser.add_argument("-f", "--folder_id", type=str, default=None,
                         help="Optional Google Drive Folder ID to upload the video into.")
+    parser.add_argument("--prompts-file", type=str, default=None,
+                        help="Path to a file with one prompt per line; videos are generated and uploaded concurrently.")
+    parser.add_argument("--no-pipeline", action="store_true",
+                        help="Download the whole video before uploading instead of streaming it straight to Drive.")
+    parser.add_argument("--upload-chunksize", type=int, default=None,
+                        help="Drive upload chunk size in bytes (use -1 for a single request; -1 requires --no-pipeline). Default: picked from the video size.")
     # Potentially add more arguments here for video generation parameters if API supports them
     # e.g., --duration, --fps
 
     args = parser.parse_args()
 
+    if not args.prompt and not args.prompts_file:
+        parser.error("provide a prompt or --prompts-file")
+    if args.prompt and args.prompts_file:
+        parser.error("use either a single prompt or --prompts-file, not both")
+
     gemini_api_key = os.getenv(GEMINI_API_KEY_ENV_VAR)
     if not gemini_api_key:
         print(f"ERROR: Google Gemini API key not found in environment variable '{GEMINI_API_KEY_ENV_VAR}'.")
@@ -258,34 +817,37 @@ def main():
         return
 
     print("--- Authenticating with Google Drive ---")
-    drive_service = get_google_drive_service()
-    if not drive_service:
+    # Authenticate once up front (and fail fast) before spending on generation;
+    # worker threads then build their own service from the cached credentials.
+    if not get_google_drive_service():
         print("Failed to authenticate with Google Drive. Exiting.")
         return
 
-    video_bytes, video_mime_type = generate_veo_video(args.prompt, gemini_api_key)
-
-    if not video_bytes or not video_mime_type:
-        print("Video generation or download failed. Exiting.")
+    if args.prompts_file:
+        try:
+            with open(args.prompts_file) as prompts_file:
+                prompts = [line.strip() for line in prompts_file if line.strip()]
+        except OSError as e:
+            print(f"ERROR: Could not read prompts file '{args.prompts_file}': {e}")
+            return
+        if not prompts:
+            print(f"ERROR: No prompts found in '{args.prompts_file}'.")
+            return
+        if args.output_filename:
+            print("Note: -o/--output_filename is ignored in batch mode; filenames are derived from each prompt.")
+            args.output_filename = None
+
+        print(f"--- Processing {len(prompts)} prompts (up to {BATCH_CONCURRENCY} concurrently) ---")
+        upload_links = asyncio.run(_process_prompts_async(prompts, gemini_api_key, args))
+
+        print("\n--- Batch summary ---")
+        for prompt, link in zip(prompts, upload_links):
+            print(f"  {'OK  ' if link else 'FAIL'} '{prompt[:50]}'" + (f" -> {link}" if link else ""))
+        succeeded = sum(1 for link in upload_links if link)
+        print(f"\nProcess complete! {succeeded}/{len(prompts)} videos uploaded.")
         return
 
-    # Determine output filename
-    if args.output_filename:
-        output_filename = args.output_filename
-        # Ensure it has a video extension if not provided
-        known_video_extensions = ('.mp4', '.mov', '.avi', '.webm', '.mkv')
-        if not output_filename.lower().endswith(known_video_extensions):
-            inferred_ext = video_mime_type.split('/')[-1]
-            if inferred_ext and inferred_ext != '*': # e.g., 'mp4' from 'video/mp4'
-                output_filename = f"{output_filename}.{inferred_ext}"
-            else:
-                output_filename = f"{output_filename}.mp4" # Default to .mp4
-    else:
-        timestamp = time.strftime("%Y%m%d-%H%M%S")
-        ext = video_mime_type.split('/')[-1] if video_mime_type and video_mime_type.split('/')[-1] != '*' else 'mp4'
-        output_filename = f"veo_video_{args.prompt[:20].replace(' ','_')}_{timestamp}.{ext}" # Add part of prompt for easier ID
-
-    upload_link = upload_to_drive(drive_service, output_filename, video_bytes, video_mime_type, args.folder_id)
+    upload_link = process_prompt(args.prompt, gemini_api_key, args)
 
     if upload_link:
         print(f"\nProcess complete! Video available at: {upload_link}")